@@ -1,9 +1,10 @@
+from functools import lru_cache
+import secrets
 from flask import Flask, render_template
-from dash import Dash, dcc, html
-from dash.dependencies import Input, Output
+from dash import Dash, ctx, dcc, html, no_update
+from dash.dependencies import ClientsideFunction, Input, Output, State
 import numpy as np
-import plotly.graph_objs as go
-import scipy.stats as stats
+from scipy.stats import ttest_ind
 
 # Import the simulation classes and logic
 from simulation import run_simulation_with_params, ConservativeSimulationParams
@@ -14,6 +15,56 @@ server = Flask(__name__)
 # Initialize Dash app on top of Flask
 app = Dash(__name__, server=server, url_base_pathname='/dash/')
 
+# Runs are keyed on their seed too: each "Run Simulation" click draws a new seed (kept in
+# 'sim-seed'), so a slider moved away and back reuses the cached result of that click
+@lru_cache(maxsize=32)
+def _cached_simulation(params, seed):
+    return run_simulation_with_params(params, seed)
+
+# Evenly spaced indices of at most max_points samples, so plotted series stay bounded in size
+def _downsample(size, max_points=500):
+    if size <= max_points:
+        return np.arange(size)
+    return np.linspace(0, size - 1, max_points).astype(int)
+
+# Static part of the result figures, sent once with the page. The clientside
+# callback only fills in the trace data and the p-value annotation.
+def _p_value_annotation():
+    return dict(x=0.5, y=1.1, xref='paper', yref='paper', text='', showarrow=False, font=dict(size=12))
+
+_TRAJECTORY_FIGURE = dict(
+    data=[
+        dict(type='scatter', x=[], y=[], mode='lines', name='Theory-Aware Group', line=dict(color='blue')),
+        dict(type='scatter', x=[], y=[], mode='lines', name='Control Group', line=dict(color='red')),
+    ],
+    layout=dict(
+        title=dict(text="Value Trajectories: Theory-Aware vs Control"),
+        xaxis=dict(title=dict(text="Time")),
+        yaxis=dict(title=dict(text="Cumulative Value")),
+        legend=dict(title=dict(text="Groups")),
+        annotations=[_p_value_annotation()]
+    )
+)
+
+_DISTRIBUTION_FIGURE = dict(
+    data=[
+        dict(type='bar', x=[], y=[], width=[], name='Theory-Aware Group', opacity=0.75, marker=dict(color='blue')),
+        dict(type='bar', x=[], y=[], width=[], name='Control Group', opacity=0.75, marker=dict(color='red')),
+    ],
+    layout=dict(
+        title=dict(text="Distribution of Final Values: Theory-Aware vs Control"),
+        xaxis=dict(title=dict(text="Final Value")),
+        yaxis=dict(title=dict(text="Frequency")),
+        legend=dict(title=dict(text="Groups")),
+        barmode='overlay',
+        annotations=[_p_value_annotation()]
+    )
+)
+
+# Slider marks for the individual/timestep counts and the 0-1 probability sliders
+_COUNT_MARKS = {i: str(i) for i in range(100, 1100, 100)}
+_PCT_MARKS = {i/10: str(i/10) for i in range(0, 11)}
+
 # Layout for the Dash app (UI components with explanations)
 app.layout = html.Div(children=[
     html.H1("Simulation Adjuster App", style={'textAlign': 'center', 'margin-bottom': '30px'}),
@@ -22,7 +73,7 @@ app.layout = html.Div(children=[
         html.Div([
             html.Label("Number of Individuals", style={'font-weight': 'bold'}),
             dcc.Slider(id='n-individuals', min=100, max=1000, step=100, value=500,
-                       marks={i: str(i) for i in range(100, 1100, 100)}),
+                       marks=_COUNT_MARKS),
             dcc.Markdown("""**Explanation**: Controls the number of individuals in the simulation.
             A higher number may provide more reliable results, but takes longer to compute.""")
         ], style={'width': '90%', 'margin': 'auto', 'padding': '15px', 'box-shadow': '0 4px 8px 0 rgba(0, 0, 0, 0.2)', 'border-radius': '10px', 'margin-bottom': '20px'}),
@@ -30,28 +81,28 @@ app.layout = html.Div(children=[
         html.Div([
             html.Label("Number of Timesteps", style={'font-weight': 'bold'}),
             dcc.Slider(id='n-timesteps', min=100, max=1000, step=100, value=500,
-                       marks={i: str(i) for i in range(100, 1100, 100)}),
+                       marks=_COUNT_MARKS),
             dcc.Markdown("""**Explanation**: Sets the number of timesteps, affecting the duration of the simulation.""")
         ], style={'width': '90%', 'margin': 'auto', 'padding': '15px', 'box-shadow': '0 4px 8px 0 rgba(0, 0, 0, 0.2)', 'border-radius': '10px', 'margin-bottom': '20px'}),
 
         html.Div([
             html.Label("Theory Understanding (0 = No understanding, 1 = Full understanding)", style={'font-weight': 'bold'}),
             dcc.Slider(id='theory-understanding', min=0.0, max=1.0, step=0.1, value=0.5,
-                       marks={i/10: str(i/10) for i in range(0, 11)}),
+                       marks=_PCT_MARKS),
             dcc.Markdown("""**Explanation**: Controls how well individuals understand the theory.""")
         ], style={'width': '90%', 'margin': 'auto', 'padding': '15px', 'box-shadow': '0 4px 8px 0 rgba(0, 0, 0, 0.2)', 'border-radius': '10px', 'margin-bottom': '20px'}),
 
         html.Div([
             html.Label("Theory Application (0 = Not applied, 1 = Fully applied)", style={'font-weight': 'bold'}),
             dcc.Slider(id='theory-application', min=0.0, max=1.0, step=0.1, value=0.5,
-                       marks={i/10: str(i/10) for i in range(0, 11)}),
+                       marks=_PCT_MARKS),
             dcc.Markdown("""**Explanation**: Controls how effectively individuals apply their theoretical understanding.""")
         ], style={'width': '90%', 'margin': 'auto', 'padding': '15px', 'box-shadow': '0 4px 8px 0 rgba(0, 0, 0, 0.2)', 'border-radius': '10px', 'margin-bottom': '20px'}),
 
         html.Div([
             html.Label("Teaching Probability (0 = Never teaches, 1 = Always teaches)", style={'font-weight': 'bold'}),
             dcc.Slider(id='teaching-probability', min=0.0, max=1.0, step=0.1, value=0.2,
-                       marks={i/10: str(i/10) for i in range(0, 11)}),
+                       marks=_PCT_MARKS),
             dcc.Markdown("""**Explanation**: Controls the likelihood of peer learning events.""")
         ], style={'width': '90%', 'margin': 'auto', 'padding': '15px', 'box-shadow': '0 4px 8px 0 rgba(0, 0, 0, 0.2)', 'border-radius': '10px', 'margin-bottom': '20px'}),
 
@@ -63,24 +114,34 @@ app.layout = html.Div(children=[
     html.Div(id='results-section', children=[
         html.H2("Simulation Results", style={'textAlign': 'center', 'margin-top': '40px'}),
         html.Div([
-            dcc.Graph(id='simulation-graph', style={'display': 'inline-block', 'width': '48%', 'padding': '10px'}),
-            dcc.Graph(id='distribution-graph', style={'display': 'inline-block', 'width': '48%', 'padding': '10px'})
+            dcc.Graph(id='simulation-graph', figure=_TRAJECTORY_FIGURE, style={'display': 'inline-block', 'width': '48%', 'padding': '10px'}),
+            dcc.Graph(id='distribution-graph', figure=_DISTRIBUTION_FIGURE, style={'display': 'inline-block', 'width': '48%', 'padding': '10px'})
         ], style={'width': '100%', 'margin': 'auto', 'textAlign': 'center'})
-    ], style={'padding': '20px'})
+    ], style={'padding': '20px'}),
+
+    dcc.Store(id='sim-data'),
+    dcc.Store(id='sim-seed')
 ])
 
-# Callback to run the simulation and update the output graphs based on user input
+# Callback to run the simulation and store the summary the graphs need
 @app.callback(
-    [Output('simulation-graph', 'figure'), Output('distribution-graph', 'figure')],
+    [Output('sim-data', 'data'), Output('sim-seed', 'data')],
     [Input('n-individuals', 'value'),
      Input('n-timesteps', 'value'),
      Input('theory-understanding', 'value'),
      Input('theory-application', 'value'),
      Input('teaching-probability', 'value'),
-     Input('run-simulation', 'n_clicks')]
+     Input('run-simulation', 'n_clicks')],
+    State('sim-seed', 'data')
 )
-def update_simulation(n_individuals, n_timesteps, theory_understanding, theory_application, teaching_probability, n_clicks):
+def update_simulation(n_individuals, n_timesteps, theory_understanding, theory_application, teaching_probability, n_clicks, seed):
     if n_clicks > 0:
+        # A click draws a fresh sample; slider changes rerun with the current click's seed.
+        # 53 bits keeps the seed exact as a JavaScript number in the browser store.
+        new_seed = ctx.triggered_id == 'run-simulation' or seed is None
+        if new_seed:
+            seed = secrets.randbits(53)
+
         # Run the simulation with adjusted parameters
         params = ConservativeSimulationParams(
             n_individuals=n_individuals,
@@ -90,85 +151,35 @@ def update_simulation(n_individuals, n_timesteps, theory_understanding, theory_a
             teaching_probability=teaching_probability
         )
         
-        results = run_simulation_with_params(params)
-        aware_values, control_values = results
+        results = _cached_simulation(params, seed)
+        aware_mean, control_mean, aware_final, control_final = results
 
         # Statistical analysis (p-value)
-        t_stat, p_value = stats.ttest_ind(aware_values[:, -1], control_values[:, -1])
-        p_value_text = f"P-value: {p_value:.4f}"
-
-        # Create plotly figure for value trajectories
-        figure = go.Figure()
-
-        # Plot mean trajectories
-        figure.add_trace(go.Scatter(
-            y=np.mean(aware_values, axis=0),
-            mode='lines',
-            name='Theory-Aware Group',
-            line=dict(color='blue')
-        ))
-        
-        figure.add_trace(go.Scatter(
-            y=np.mean(control_values, axis=0),
-            mode='lines',
-            name='Control Group',
-            line=dict(color='red')
-        ))
-
-        figure.update_layout(
-            title="Value Trajectories: Theory-Aware vs Control",
-            xaxis_title="Time",
-            yaxis_title="Cumulative Value",
-            legend_title="Groups",
-            annotations=[
-                dict(
-                    x=0.5,
-                    y=1.1,
-                    xref='paper',
-                    yref='paper',
-                    text=p_value_text,
-                    showarrow=False,
-                    font=dict(size=12)
-                )
-            ]
-        )
-
-        # Create plotly figure for distribution of final values
-        distribution_figure = go.Figure()
-        distribution_figure.add_trace(go.Histogram(
-            x=aware_values[:, -1],
-            name='Theory-Aware Group',
-            opacity=0.75,
-            marker=dict(color='blue')
-        ))
-        distribution_figure.add_trace(go.Histogram(
-            x=control_values[:, -1],
-            name='Control Group',
-            opacity=0.75,
-            marker=dict(color='red')
-        ))
-
-        distribution_figure.update_layout(
-            title="Distribution of Final Values: Theory-Aware vs Control",
-            xaxis_title="Final Value",
-            yaxis_title="Frequency",
-            legend_title="Groups",
-            barmode='overlay',
-            annotations=[
-                dict(
-                    x=0.5,
-                    y=1.1,
-                    xref='paper',
-                    yref='paper',
-                    text=p_value_text,
-                    showarrow=False,
-                    font=dict(size=12)
-                )
-            ]
-        )
-
-        return figure, distribution_figure
-    return go.Figure(), go.Figure()
+        t_stat, p_value = ttest_ind(aware_final, control_final, equal_var=False)
+
+        # Only the plotted series are sent; the figures are built client-side (assets/sim.js).
+        # Mean trajectories are downsampled and the final value histograms are binned here.
+        steps = _downsample(params.n_timesteps)
+        bin_edges = np.histogram_bin_edges(np.concatenate([aware_final, control_final]), bins='auto')
+        return {
+            'steps': steps.tolist(),
+            'aware_mean': aware_mean[steps].tolist(),
+            'control_mean': control_mean[steps].tolist(),
+            'bin_centers': ((bin_edges[:-1] + bin_edges[1:]) / 2).tolist(),
+            'bin_widths': np.diff(bin_edges).tolist(),
+            'aware_counts': np.histogram(aware_final, bins=bin_edges)[0].tolist(),
+            'control_counts': np.histogram(control_final, bins=bin_edges)[0].tolist(),
+            'p_value': float(p_value),
+        }, seed if new_seed else no_update
+    return None, no_update
+
+# Update the value trajectory and final value distribution figures in the browser
+app.clientside_callback(
+    ClientsideFunction(namespace='sim', function_name='render'),
+    [Output('simulation-graph', 'figure'), Output('distribution-graph', 'figure')],
+    Input('sim-data', 'data'),
+    [State('simulation-graph', 'figure'), State('distribution-graph', 'figure')]
+)
 
 # Flask route for homepage
 @server.route('/')
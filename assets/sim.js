@@ -0,0 +1,34 @@
+// Updates the result figures in the browser from the summary data stored in 'sim-data'.
+// The layouts are sent once with the page; only the traces and the p-value change.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    sim: {
+        render: function(data, figure, distributionFigure) {
+            if (!data) {
+                return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+            }
+
+            // Copy of a figure with new trace data and p-value annotation text
+            var update = function(fig, traces) {
+                var annotations = fig.layout.annotations.slice();
+                annotations[0] = Object.assign({}, annotations[0], {text: 'P-value: ' + data.p_value.toFixed(4)});
+                return {
+                    data: fig.data.map(function(trace, i) { return Object.assign({}, trace, traces[i]); }),
+                    layout: Object.assign({}, fig.layout, {annotations: annotations})
+                };
+            };
+
+            return [
+                // Mean value trajectories
+                update(figure, [
+                    {x: data.steps, y: data.aware_mean},
+                    {x: data.steps, y: data.control_mean}
+                ]),
+                // Distribution of final values (binned server-side)
+                update(distributionFigure, [
+                    {x: data.bin_centers, y: data.aware_counts, width: data.bin_widths},
+                    {x: data.bin_centers, y: data.control_counts, width: data.bin_widths}
+                ])
+            ];
+        }
+    }
+});
@@ -2,6 +2,7 @@ from dataclasses import dataclass
 import numpy as np
 import matplotlib.pyplot as plt
 from tqdm import tqdm
+from numba import njit, prange
 
 # Redefining necessary components due to the environment reset
 @dataclass
@@ -22,136 +23,147 @@ class ConservativeSimulationParams:
     receptiveness_threshold: float = 0.3  # Conservative mood threshold for learning from others
     teaching_probability: float = 0.1     # Very slow peer learning rate
 
-class Individual:
-    def __init__(self, params: ConservativeSimulationParams, has_theory_knowledge: bool = False):
-        self.params = params
-        self.value = 0.0
-        self.emotional_state = 0.0
-        self.perspective_level = 0.0
-        self.choice_history = []
-        self.value_history = []
-        self.emotional_history = []
-        self.in_spin = False
-        self.spin_countdown = 0
-        self.has_theory_knowledge = has_theory_knowledge
-        self.theory_understanding = params.theory_understanding if has_theory_knowledge else 0.0
-        self.theory_application = params.theory_application if has_theory_knowledge else 0.0
-        
-    def make_choice(self, network_influence: float = 0.0) -> float:
-        base_choice = np.random.normal(0, self.params.baseline_choice_std)
-        
+# Individuals are stored as parallel arrays (one entry per individual) so the
+# per-timestep updates can run as compiled kernels over the whole population.
+# float32 is plenty for the model and halves the memory traffic.
+@dataclass
+class Population:
+    value: np.ndarray
+    emo: np.ndarray         # Emotional state
+    persp: np.ndarray       # Perspective level
+    spin_cd: np.ndarray     # Steps left in the current emotional spin
+    in_spin: np.ndarray
+    has_theory: np.ndarray
+    und: np.ndarray         # Theory understanding (0 without theory knowledge)
+    app: np.ndarray         # Theory application (0 without theory knowledge)
+    step_count: np.ndarray  # Number of choices made so far, drives learning
+
+    @classmethod
+    def create(cls, n: int, params: ConservativeSimulationParams, aware_mask: np.ndarray) -> "Population":
+        return cls(
+            value=np.zeros(n, dtype=np.float32),
+            emo=np.zeros(n, dtype=np.float32),
+            persp=np.zeros(n, dtype=np.float32),
+            spin_cd=np.zeros(n, dtype=np.int64),
+            in_spin=np.zeros(n, dtype=np.bool_),
+            has_theory=aware_mask.copy(),
+            und=np.where(aware_mask, params.theory_understanding, 0.0).astype(np.float32),
+            app=np.where(aware_mask, params.theory_application, 0.0).astype(np.float32),
+            step_count=np.zeros(n, dtype=np.int64),
+        )
+
+# The kernels below take the Population arrays they touch plus this step's random
+# draws, which are generated up front to keep np.random out of the parallel loops.
+# The explicit signatures compile them eagerly at import, and cache=True reuses the
+# compiled code across runs.
+# Theory understanding and application are 0 for individuals without theory
+# knowledge, so one set of formulas covers both groups.
+@njit('void(f4[::1], f4[::1], f4[::1], f4[::1], f4[::1], i8[::1], f4[::1], UniTuple(f8, 5))', parallel=True, fastmath=True, cache=True)
+def make_choice(value, emo, persp, und, app, step_count, rand_normals, choice_params):
+    baseline_choice_std, emotional_impact, perspective_strength, network_strength, learning_rate = choice_params
+    network_influence = 0.0
+
+    for i in prange(value.shape[0]):
+        base_choice = rand_normals[i] * baseline_choice_std
+
         # Theory-aware individuals are better at:
-        if self.has_theory_knowledge:
-            # 1. Recognizing emotional states (reduced negative impact)
-            emotional_effect = -self.emotional_state * self.params.emotional_impact * (1 - self.theory_understanding)
-            
-            # 2. Taking perspective (increased positive impact)
-            perspective_effect = self.perspective_level * self.params.perspective_strength * (1 + self.theory_understanding)
-            
-            # 3. Learning from others (enhanced network effect)
-            network_effect = network_influence * self.params.network_strength * (1 + self.theory_application)
-            
-            # 4. Faster learning
-            learning_effect = len(self.choice_history) * self.params.learning_rate * (1 + self.theory_application)
-        else:
-            emotional_effect = -self.emotional_state * self.params.emotional_impact
-            perspective_effect = self.perspective_level * self.params.perspective_strength
-            network_effect = network_influence * self.params.network_strength
-            learning_effect = len(self.choice_history) * self.params.learning_rate
-        
+        # 1. Recognizing emotional states (reduced negative impact)
+        emotional_effect = -emo[i] * emotional_impact * (1 - und[i])
+
+        # 2. Taking perspective (increased positive impact)
+        perspective_effect = persp[i] * perspective_strength * (1 + und[i])
+
+        # 3. Learning from others (enhanced network effect)
+        network_effect = network_influence * network_strength * (1 + app[i])
+
+        # 4. Faster learning
+        learning_effect = step_count[i] * learning_rate * (1 + app[i])
+        step_count[i] += 1
+
         choice = base_choice + emotional_effect + perspective_effect + network_effect + learning_effect
-        choice = np.clip(choice, -1, 1)
-        
-        self.choice_history.append(choice)
-        self.value += choice
-        self.value_history.append(self.value)
-        self.emotional_history.append(self.emotional_state)
-        
-        return choice
-    
-    def update_state(self):
+        value[i] += min(1.0, max(-1.0, choice))
+
+@njit('void(f4[::1], f4[::1], i8[::1], b1[::1], f4[::1], f4[::1], f4[:, ::1], Tuple((f8, i8, f8)))', parallel=True, fastmath=True, cache=True)
+def update_state(emo, persp, spin_cd, in_spin, und, app, rand_uniforms, state_params):
+    spin_frequency, spin_duration, perspective_probability = state_params
+
+    for i in prange(emo.shape[0]):
         # Theory-aware individuals:
-        if self.has_theory_knowledge:
-            # 1. Have shorter emotional spins
-            if not self.in_spin:
-                if np.random.random() < self.params.spin_frequency * (1 - self.theory_understanding):
-                    self.in_spin = True
-                    self.spin_countdown = int(self.params.spin_duration * (1 - self.theory_understanding))
-                    self.emotional_state = np.random.uniform(0.5, 1.0) * (1 - self.theory_understanding)
-            else:
-                self.spin_countdown -= 1
-                if self.spin_countdown <= 0:
-                    self.in_spin = False
-                    self.emotional_state = 0.0
-            
-            # 2. Have more frequent perspective shifts
-            if np.random.random() < self.params.perspective_probability * (1 + self.theory_application):
-                self.perspective_level = min(1.0, self.perspective_level + 0.1 * (1 + self.theory_understanding))
+        # 1. Have shorter emotional spins
+        if not in_spin[i]:
+            if rand_uniforms[i, 0] < spin_frequency * (1 - und[i]):
+                in_spin[i] = True
+                spin_cd[i] = int(spin_duration * (1 - und[i]))
+                emo[i] = (0.5 + 0.5 * rand_uniforms[i, 1]) * (1 - und[i])
         else:
-            # Non-theory-aware individuals' state updates
-            if not self.in_spin:
-                if np.random.random() < self.params.spin_frequency:
-                    self.in_spin = True
-                    self.spin_countdown = self.params.spin_duration
-                    self.emotional_state = np.random.uniform(0.5, 1.0)
-            else:
-                self.spin_countdown -= 1
-                if self.spin_countdown <= 0:
-                    self.in_spin = False
-                    self.emotional_state = 0.0
-            
-            if np.random.random() < self.params.perspective_probability:
-                self.perspective_level = min(1.0, self.perspective_level + 0.1)
-
-    def try_to_educate(self, others):
-        if self.has_theory_knowledge:
-            for other in others:
-                if not other.has_theory_knowledge:  # Only educate those without theory knowledge
-                    if other.emotional_state < self.params.receptiveness_threshold:
-                        if np.random.random() < self.params.teaching_probability:
-                            other.theory_understanding += 0.05
-                            other.theory_application += 0.03
-                            other.has_theory_knowledge = True  # They gain theory knowledge
-                            other.theory_understanding = min(1.0, other.theory_understanding)
-                            other.theory_application = min(1.0, other.theory_application)
+            spin_cd[i] -= 1
+            if spin_cd[i] <= 0:
+                in_spin[i] = False
+                emo[i] = 0.0
+
+        # 2. Have more frequent perspective shifts
+        if rand_uniforms[i, 2] < perspective_probability * (1 + app[i]):
+            persp[i] = min(1.0, persp[i] + 0.1 * (1 + und[i]))
+
+@njit('void(f4[::1], b1[::1], f4[::1], f4[::1], f4[:], UniTuple(f8, 2))', parallel=True, fastmath=True, cache=True)
+def try_to_educate(emo, has_theory, und, app, rand_uniforms, educate_params):
+    # A receptive individual without theory knowledge is taught if any of the
+    # theory-aware teachers succeeds, which happens with probability p_taught
+    receptiveness_threshold, p_taught = educate_params
+
+    for i in prange(emo.shape[0]):
+        if not has_theory[i] and emo[i] < receptiveness_threshold:
+            if rand_uniforms[i] < p_taught:
+                und[i] = min(1.0, und[i] + 0.05)
+                app[i] = min(1.0, app[i] + 0.03)
+                has_theory[i] = True  # They gain theory knowledge
 
 # Running the conservative simulation
 def run_conservative_simulation():
     print("Running conservative simulation with peer learning...")
     params = ConservativeSimulationParams()
-    
-    # Create two groups: with and without theory knowledge
-    aware_group = [Individual(params, has_theory_knowledge=True) for _ in range(params.n_individuals // 2)]
-    control_group = [Individual(params, has_theory_knowledge=False) for _ in range(params.n_individuals // 2)]
-    
-    all_individuals = aware_group + control_group  # Both groups combined
-    
+    n_aware = params.n_individuals // 2
+    n = 2 * n_aware
+
+    # Create two groups: with and without theory knowledge (the first n_aware individuals are aware)
+    pop = Population.create(n, params, np.arange(n) < n_aware)
+
+    choice_params = (params.baseline_choice_std, params.emotional_impact, params.perspective_strength,
+                     params.network_strength, params.learning_rate)
+    state_params = (params.spin_frequency, params.spin_duration, params.perspective_probability)
+    # Each of the n_aware original theory-aware individuals teaches with teaching_probability
+    educate_params = (params.receptiveness_threshold, 1 - (1 - params.teaching_probability) ** n_aware)
+
+    # Pre-generate the random draws for every timestep: one normal for the choice and
+    # uniforms for the spin chance, spin intensity, perspective shift and peer learning
+    rng = np.random.default_rng()
+    rand_normals = rng.standard_normal((params.n_timesteps, n), dtype=np.float32)
+    rand_uniforms = rng.random((params.n_timesteps, n, 4), dtype=np.float32)
+
     # Track results
-    values = np.zeros((params.n_individuals, params.n_timesteps))
-    
+    values = np.zeros((n, params.n_timesteps), dtype=np.float32)
+
     # Run simulation
-    for t in tqdm(range(params.n_timesteps)):
+    for t in tqdm(range(params.n_timesteps), mininterval=0.5):
         # Each individual makes a choice and updates their state
-        for i, ind in enumerate(all_individuals):
-            choice = ind.make_choice()
-            values[i, t] = ind.value
-            ind.update_state()
-        
+        make_choice(pop.value, pop.emo, pop.persp, pop.und, pop.app, pop.step_count, rand_normals[t], choice_params)
+        values[:, t] = pop.value
+        update_state(pop.emo, pop.persp, pop.spin_cd, pop.in_spin, pop.und, pop.app, rand_uniforms[t], state_params)
+
         # Theory-aware individuals try to educate others
-        for ind in aware_group:
-            ind.try_to_educate(all_individuals)
+        try_to_educate(pop.emo, pop.has_theory, pop.und, pop.app, rand_uniforms[t, :, 3], educate_params)
     
     # Plot results and analyze metrics
     plt.figure(figsize=(15, 10))
     
     # Plot individual trajectories
     plt.subplot(2, 1, 1)
-    for i in range(params.n_individuals):
+    for i in range(n):
         plt.plot(values[i, :], 'b-', alpha=0.05)
     
     # Plot means
-    plt.plot(np.mean(values[:len(aware_group)], axis=0), 'b-', linewidth=2, label='Theory-Aware Group')
-    plt.plot(np.mean(values[len(aware_group):], axis=0), 'r-', linewidth=2, label='Control Group')
+    plt.plot(np.mean(values[:n_aware], axis=0), 'b-', linewidth=2, label='Theory-Aware Group')
+    plt.plot(np.mean(values[n_aware:], axis=0), 'r-', linewidth=2, label='Control Group')
     
     plt.title('Value Trajectories: Theory-Aware vs Control Groups (Conservative Settings)')
     plt.xlabel('Time')
@@ -160,8 +172,8 @@ def run_conservative_simulation():
     
     # Plot final distributions
     plt.subplot(2, 1, 2)
-    plt.hist(values[:len(aware_group), -1], bins=20, alpha=0.5, color='b', label='Theory-Aware Final Values')
-    plt.hist(values[len(aware_group):, -1], bins=20, alpha=0.5, color='r', label='Control Final Values')
+    plt.hist(values[:n_aware, -1], bins=20, alpha=0.5, color='b', label='Theory-Aware Final Values')
+    plt.hist(values[n_aware:, -1], bins=20, alpha=0.5, color='r', label='Control Final Values')
     plt.title('Distribution of Final Values (Conservative Settings)')
     plt.xlabel('Final Value')
     plt.ylabel('Count')
@@ -175,12 +187,12 @@ def run_conservative_simulation():
     
     # Calculate and print metrics
     metrics = {
-        'aware_mean_final': np.mean(values[:len(aware_group), -1]),
-        'control_mean_final': np.mean(values[len(aware_group):, -1]),
-        'aware_std_final': np.std(values[:len(aware_group), -1]),
-        'control_std_final': np.std(values[len(aware_group):, -1]),
-        'aware_positive_ratio': np.mean(values[:len(aware_group), -1] > 0),
-        'control_positive_ratio': np.mean(values[len(aware_group):, -1] > 0),
+        'aware_mean_final': np.mean(values[:n_aware, -1]),
+        'control_mean_final': np.mean(values[n_aware:, -1]),
+        'aware_std_final': np.std(values[:n_aware, -1]),
+        'control_std_final': np.std(values[n_aware:, -1]),
+        'aware_positive_ratio': np.mean(values[:n_aware, -1] > 0),
+        'control_positive_ratio': np.mean(values[n_aware:, -1] > 0),
     }
     
     print("\nSimulation Metrics (Conservative Settings):")
@@ -190,4 +202,4 @@ def run_conservative_simulation():
     return
 
 if __name__ == "__main__":
-    metrics = run_comparative_simulation()
+    metrics = run_conservative_simulation()
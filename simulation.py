@@ -1,25 +1,30 @@
+from dataclasses import dataclass
 import numpy as np
-from tqdm import tqdm
 
+# Frozen so parameter sets are hashable and can key the app's result cache
+@dataclass(frozen=True)
 class ConservativeSimulationParams:
-    def __init__(self, n_individuals, n_timesteps, theory_understanding, theory_application, teaching_probability):
-        self.n_individuals = n_individuals
-        self.n_timesteps = n_timesteps
-        self.theory_understanding = theory_understanding
-        self.theory_application = theory_application
-        self.teaching_probability = teaching_probability
+    n_individuals: int
+    n_timesteps: int
+    theory_understanding: float
+    theory_application: float
+    teaching_probability: float
+
+# Shared generator for unseeded runs
+_rng = np.random.default_rng()
 
 # Simulate with parameters from the UI
-def run_simulation_with_params(params):
-    aware_values = np.zeros((params.n_individuals // 2, params.n_timesteps))
-    control_values = np.zeros((params.n_individuals // 2, params.n_timesteps))
+def run_simulation_with_params(params, seed=None):
+    rng = _rng if seed is None else np.random.default_rng(seed)
+    n_half = params.n_individuals // 2
 
-    # Simulate both groups (theory-aware vs control)
-    for t in range(params.n_timesteps):
-        for i in range(params.n_individuals // 2):
-            # Simulate choices for theory-aware individuals
-            aware_values[i, t] = aware_values[i, t - 1] + np.random.normal(0, 1)
-            # Simulate choices for control individuals
-            control_values[i, t] = control_values[i, t - 1] + np.random.normal(0, 1)
+    # One contiguous block of per-step choices for both groups (theory-aware vs control)
+    increments = np.empty((2, n_half, params.n_timesteps), dtype=np.float32)
+    rng.standard_normal(size=increments.shape, dtype=np.float32, out=increments)
 
-    return aware_values, control_values
+    # Only the group means over time and each individual's final value are used, so the
+    # walks themselves are never built: the mean walk is the running sum of the mean
+    # choice, and each walk ends at the sum of its choices
+    aware_mean, control_mean = increments.mean(axis=1).cumsum(axis=1)
+    aware_final, control_final = increments.sum(axis=2)
+    return aware_mean, control_mean, aware_final, control_final